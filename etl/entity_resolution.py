@@ -20,53 +20,212 @@ To improve recall we could enrich the dataset with LinkedIn look-ups for the Top
 LinkedIn scraping is intentionally *not* included in this repository because it violates LinkedIn terms of service and would require headless browser automation.
 """
 
-from typing import List, Dict
+from collections import defaultdict
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process, utils
 
+logger = logging.getLogger(__name__)
 
-def _is_duplicate(name1: str, name2: str, threshold: int = 88) -> bool:
-    """Return True if two names are similar enough to be considered duplicates."""
 
-    if name1.lower() == name2.lower():
-        return True
-    return fuzz.token_sort_ratio(name1, name2) >= threshold
+# Sources whose handle is shown for a merged profile, in order of preference;
+# otherwise the profile's first handle is used.
+HANDLE_PRIORITY = ("codeforces", "atcoder")
 
 
-def resolve_entities(entities: List[Dict]) -> List[Dict]:
+def display_handle(handles: Dict[str, str]) -> str:
+    """Return the handle to show for a profile with *handles* (source → handle)."""
+
+    for src in HANDLE_PRIORITY:
+        handle = handles.get(src)
+        if handle:
+            return handle
+    for handle in handles.values():
+        return handle
+    return ""
+
+
+@dataclass
+class ResolvedEntity:
+    """Merge state for one cluster while folding its entities together.
+
+    Slotted (no per-instance ``__dict__``) so attribute access in the merge
+    loop is cheaper than dict lookups; converted back to a plain dict once
+    the cluster is complete.
+    """
+
+    __slots__ = ("record", "rating", "source", "handles")
+
+    record: Dict
+    rating: float
+    source: Optional[str]
+    handles: Dict[str, str]
+
+    def to_dict(self) -> Dict:
+        # Copy to avoid mutating original list
+        out = self.record.copy()
+        if self.rating != self.record.get("rating", 0):
+            out["rating"] = self.rating
+            out["source"] = self.source
+        out["handles"] = self.handles
+        # Main handle for display – computed once here so report rendering
+        # is a plain field read.
+        out["display_handle"] = display_handle(self.handles)
+        return out
+
+
+# Scorers by name, applied to names already normalised by _normalise_name
+# (token-sorted).  "token_sort" is the default; "token_set" also scores 100
+# when one name's tokens are a subset of the other's ("alex" vs "alex smith"),
+# which chains unrelated people together through short handles, so it is
+# opt-in only.
+_NORMALISED_SCORERS = {
+    "token_sort": fuzz.ratio,
+    "token_set": fuzz.token_set_ratio,
+}
+
+
+def _normalise_name(name: str) -> str:
+    """Return *name* lowercased, stripped of punctuation and token-sorted.
+
+    ``fuzz.ratio`` on two normalised names equals ``fuzz.token_sort_ratio``
+    on the processed originals, so the tokenise+sort step runs once per
+    entity instead of once per comparison.
+    """
+
+    # Fall back to the plain lowercase name when processing strips everything
+    # (e.g. emoji-only display names) so those do not all collapse onto "".
+    processed = utils.default_process(name) or name.lower()
+    return " ".join(sorted(processed.split()))
+
+
+def _blocking_keys(name: str) -> List[str]:
+    """Return the blocking keys for a normalised *name*.
+
+    Names are only compared when they share a key: the first four characters
+    or, for multi-token names, the last token (catches typos early in the
+    name that change the prefix).
+    """
+
+    keys = [f"prefix:{name[:4]}"]
+    tokens = name.split()
+    if len(tokens) > 1:
+        keys.append(f"token:{tokens[-1]}")
+    return keys
+
+
+def _cluster_labels(names: List[str], threshold: int = 88, scorer: str = "token_sort") -> List[int]:
+    """Return a cluster label per normalised name (the index of its representative).
+
+    Names are bucketed by :func:`_blocking_keys`; within each block all
+    pairwise ratios are computed in one ``process.cdist`` call (C,
+    multi-threaded) instead of one Python-level call per pair.  Clusters are
+    then formed in input order: a name joins the earliest cluster whose
+    *representative* (first member) it matches, otherwise it starts a new
+    one.  Matching a mere member is not enough, so chains A~B~C with A≁C do
+    not collapse into a single cluster.
+    """
+
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for idx, name in enumerate(names):
+        for key in _blocking_keys(name):
+            blocks[key].append(idx)
+
+    # Earlier names each name matches (blocks overlap, hence sets)
+    earlier_matches: Dict[int, set] = defaultdict(set)
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        block_names = [names[i] for i in members]
+        sim = process.cdist(
+            block_names,
+            block_names,
+            scorer=_NORMALISED_SCORERS[scorer],
+            score_cutoff=threshold,
+            dtype=np.uint8,
+            workers=-1,
+        )
+        # Upper triangle only – the matrix is symmetric and the diagonal is trivially 100
+        for i, j in np.argwhere(np.triu(sim >= threshold, k=1)):
+            earlier_matches[members[j]].add(members[i])  # members are in input order, so i < j
+
+    labels = list(range(len(names)))
+    for idx in range(len(names)):
+        reps = [j for j in earlier_matches.get(idx, ()) if labels[j] == j]
+        if reps:
+            labels[idx] = min(reps)
+    return labels
+
+
+def resolve_entities(entities: List[Dict], scorer: str = "token_sort", fuzzy: bool = True) -> List[Dict]:
     """Deduplicate entities appearing across multiple sources.
 
     The function merges profiles that share the same (or very similar) names.
     Handles typos via fuzzy-matching and aggregates handles per source.
+    *scorer* selects the RapidFuzz ratio (``"token_sort"`` or the more
+    permissive ``"token_set"``).  With ``fuzzy=False`` only repeats of the
+    same (source, handle) are folded – name matching is skipped entirely,
+    which is what a single-source run needs.
     """
-    resolved: List[Dict] = []
+    if scorer not in _NORMALISED_SCORERS:
+        raise ValueError(f"Unknown scorer {scorer!r}; expected one of {sorted(_NORMALISED_SCORERS)}")
+
+    # Exact matches (same source+handle, or same normalised name) are grouped
+    # with O(1) dict hits so only one name per group reaches RapidFuzz.
+    by_handle: Dict[Tuple[str, str], int] = {}
+    by_norm_name: Dict[str, int] = {}
+    group_names: List[str] = []
+    groups: List[int] = []
 
     for ent in entities:
-        match = None
-        for existing in resolved:
-            if _is_duplicate(ent["name"], existing["name"]):
-                match = existing
-                break
+        norm_name = _normalise_name(ent.get("name") or "") if fuzzy else ""
+        handle_key: Optional[Tuple[str, str]] = None
+        if ent.get("source") and ent.get("handle"):
+            handle_key = (ent["source"], ent["handle"])
+
+        group = by_handle.get(handle_key) if handle_key else None
+        if group is None and fuzzy:
+            group = by_norm_name.get(norm_name)
+        if group is None:
+            group = len(group_names)
+            group_names.append(norm_name)
+
+        by_norm_name.setdefault(norm_name, group)
+        if handle_key:
+            by_handle.setdefault(handle_key, group)
+        groups.append(group)
+
+    group_labels = _cluster_labels(group_names, scorer=scorer) if fuzzy else range(len(group_names))
+
+    clusters: Dict[int, ResolvedEntity] = {}
+
+    for ent, group in zip(entities, groups):
+        label = group_labels[group]
+        match = clusters.get(label)
+        has_handle = bool(ent.get("source") and ent.get("handle"))
 
         if match is None:
-            # Copy to avoid mutating original list
-            new_ent = ent.copy()
-            if ent.get("source") and ent.get("handle"):
-                new_ent["handles"] = {ent["source"]: ent["handle"]}
-            else:
-                new_ent["handles"] = {}
-            resolved.append(new_ent)
+            clusters[label] = ResolvedEntity(
+                record=ent,
+                rating=ent.get("rating", 0),
+                source=ent.get("source"),
+                handles={ent["source"]: ent["handle"]} if has_handle else {},
+            )
         else:
             # Merge data – prefer higher rating if conflict
-            if ent["rating"] > match.get("rating", 0):
-                match["rating"] = ent["rating"]
-                match["source"] = ent["source"]
+            if ent.get("rating", 0) > match.rating:
+                match.rating = ent["rating"]
+                match.source = ent["source"]
             # Update handles map
-            if ent.get("source") and ent.get("handle"):
-                handles = match.setdefault("handles", {})
-                handles[ent["source"]] = ent["handle"]
+            if has_handle:
+                match.handles[ent["source"]] = ent["handle"]
 
+    # Dicts preserve insertion order, so clusters follow first appearance
+    resolved = [cluster.to_dict() for cluster in clusters.values()]
     return resolved
 
 
-__all__ = ["resolve_entities"] 
\ No newline at end of file
+__all__ = ["display_handle", "resolve_entities"] 
\ No newline at end of file
@@ -1,47 +1,75 @@
 """Report module: writes Markdown reports summarising results."""
 
-from typing import List, Dict, Union
+import heapq
+from operator import itemgetter
+from typing import IO, List, Dict, Optional, Union
 from pathlib import Path
 
+from .entity_resolution import display_handle
 
-def write_markdown_report(entities: List[Dict], output_path: Union[str, Path] = "report.md") -> None:
-    """Write a Markdown report summarising the ranked entities.
 
-    Parameters
-    ----------
-    entities : List[Dict]
-        Entities, ideally sorted by interestingness.
-    output_path : Union[str, Path], optional
-        Destination file path, by default "report.md".
-    """
-    lines: List[str] = ["# Talent Identification Report", "\n"]
+def _write_report(entities: List[Dict], fh: IO[str]) -> None:
+    fh.write("# Talent Identification Report\n\n\n")
 
     # Disclaimer about country completeness
     total = len(entities)
-    missing_country = sum(1 for e in entities if not e.get("country"))
-    leet_missing = sum(1 for e in entities if e.get("source") == "leetcode" and not e.get("country"))
-    kag_missing = sum(1 for e in entities if e.get("source") == "kaggle" and not e.get("country"))
+    missing_country = leet_missing = kag_missing = 0
+    for e in entities:
+        if not e.get("country"):
+            missing_country += 1
+            src = e.get("source")
+            if src == "leetcode":
+                leet_missing += 1
+            elif src == "kaggle":
+                kag_missing += 1
 
-    lines.append(
+    fh.write(
         f"> Note: country metadata is sparse — overall {missing_country}/{total} profiles lack a country code. "
-        f"Kaggle missing: {kag_missing}, LeetCode missing: {leet_missing}."
+        f"Kaggle missing: {kag_missing}, LeetCode missing: {leet_missing}.\n\n"
     )
-    lines.append("\n")
 
     for rank, entity in enumerate(entities, start=1):
         name = entity.get("name", "Unknown")
         score = entity.get("score", "N/A")
         reason = entity.get("reason", "")
-        # main handle: prefer Codeforces then AtCoder
-        handles = entity.get("handles", {entity.get("source", ""): entity.get("handle", "")})
-        handle_display = handles.get("codeforces") or handles.get("atcoder") or next(iter(handles.values()), "")
+        # main handle (prefer Codeforces then AtCoder) is stamped by entity resolution
+        handle_display = entity.get("display_handle")
+        if handle_display is None:
+            handle_display = display_handle(entity.get("handles", {entity.get("source", ""): entity.get("handle", "")}))
 
-        line = f"## {rank}. {name} ({handle_display}) — {score}"
+        fh.write(f"\n## {rank}. {name} ({handle_display}) — {score}")
         if reason:
-            line += f"\n> {reason}"
+            fh.write(f"\n> {reason}")
+
+
+def write_markdown_report(
+    entities: List[Dict],
+    output_path: Union[str, Path, IO[str]] = "report.md",
+    top_n: Optional[int] = None,
+) -> None:
+    """Write a Markdown report summarising the ranked entities.
+
+    Lines are streamed to the destination rather than joined in memory.
+
+    Parameters
+    ----------
+    entities : List[Dict]
+        Entities, ideally sorted by interestingness.
+    output_path : Union[str, Path, IO[str]], optional
+        Destination file path or an already-open text stream (e.g. an fsspec
+        writer), by default "report.md".
+    top_n : Optional[int], optional
+        If given, only the *top_n* highest-``score`` entities are reported
+        (selected with a heap, so *entities* need not be sorted).
+    """
+    if top_n is not None:
+        entities = heapq.nlargest(top_n, entities, key=itemgetter("score"))
 
-        lines.append(line)
+    if hasattr(output_path, "write"):
+        _write_report(entities, output_path)
+        return
 
-    Path(output_path).write_text("\n".join(lines))
+    with Path(output_path).open("w", encoding="utf-8", buffering=1 << 20) as fh:
+        _write_report(entities, fh)
 
 __all__ = ["write_markdown_report"] 
\ No newline at end of file
@@ -27,80 +27,229 @@ place):
    fastest month-over-month growth in India."*
 """
 
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 import math
 
-# No per-source default multipliers now
+import numpy as np
 
+# Optional JIT – the pure-Python versions below are used when Numba is absent
+try:
+    from numba import njit, prange  # type: ignore
 
-def interestingness_score(profile: Dict) -> Tuple[float, str]:
-    """Compute the interestingness score and reason for a profile.
+    _HAVE_NUMBA = True
+except ImportError:  # pragma: no cover – numba not installed
+    _HAVE_NUMBA = False
+    prange = range
 
-    Current heuristic:
-    - Base score = percentile + capped z-score.
-    - Bonus (10%) if the user comes from multiple sources (demonstrates versatility).
-    - The reason string explains the contributors.
-    """
+    def njit(*args, **kwargs):  # type: ignore
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# No per-source default multipliers now
+
+
+@njit(cache=True)
+def _score_components(
+    rating_z: float,
+    has_z: bool,
+    norm: float,
+    delta_sigma: float,
+    versatility: float,
+    geo_norm: float,
+    rank: float,
+    total_in_src: float,
+    is_atcoder: bool,
+    n_handles: int,
+) -> Tuple[float, float, float, float, float, float, float]:
+    """Return the individual score contributors (no dict access, JIT-friendly)."""
 
     # Primary z: per-source rating z-score (avoids percentile saturation).
-    if "rating_z" in profile:
-        z = profile["rating_z"]
-        base_score = (1 / (1 + math.exp(-z))) * 1000
+    if has_z:
+        base_score = (1 / (1 + math.exp(-rating_z))) * 1000
     else:
         # Simpler: use global percentile directly (0–1 → 0–1000)
-        p = min(max(profile.get("norm", 0.0), 0.0), 1.0)
-        z = None
-        base_score = p * 1000
-
-    z_bonus = 0  # no separate bonus – z already captured
+        base_score = min(max(norm, 0.0), 1.0) * 1000
 
     # Multi-platform bonus
-    multi_source_bonus = 50 if len(profile.get("handles", {})) > 1 else 0.0
+    multi_source_bonus = 50.0 if n_handles > 1 else 0.0
 
     # Momentum bonus (delta sigma)
-    momentum = profile.get("delta_sigma", 0.0) * 50  # ±50 per std-dev
+    momentum = delta_sigma * 50  # ±50 per std-dev
 
     # Versatility factor
-    versatility_factor = 1 + min(0.25, 0.1 * (profile.get("versatility",1)-1))
+    versatility_factor = 1 + min(0.25, 0.1 * (versatility - 1))
 
     # AtCoder-specific rank bonus to elevate top positions
     rank_bonus = 0.0
-    if profile.get("source") == "atcoder" and profile.get("rank") and profile.get("total_in_src"):
-        total = profile["total_in_src"]
-        if total > 1:
-            rank_bonus = (total - profile["rank"] + 1) / total * 300  # up to +300
+    if is_atcoder and rank and total_in_src > 1:
+        rank_bonus = (total_in_src - rank + 1) / total_in_src * 300  # up to +300
 
-    # --------------------------- NEW BONUSES ---------------------------
     # Geography bonus – reward top performers within their country bucket
-    geo_norm = profile.get("geo_norm", 0.0)
     geo_bonus = (geo_norm ** 2) * 100  # squared to emphasise top spots (max +100)
 
     # Rising-star bonus if yesterday-to-today sigma jump is significant
-    rising_bonus = 50 if profile.get("delta_sigma", 0.0) > 1.5 else 0.0
+    rising_bonus = 50.0 if delta_sigma > 1.5 else 0.0
 
-    # -------------------------------------------------------------------
+    return base_score, momentum, geo_bonus, rising_bonus, versatility_factor, multi_source_bonus, rank_bonus
+
+
+@njit(cache=True)
+def _combine_components(
+    base_score: float,
+    momentum: float,
+    geo_bonus: float,
+    rising_bonus: float,
+    versatility_factor: float,
+    multi_source_bonus: float,
+    rank_bonus: float,
+) -> float:
+    """Combine the contributors from :func:`_score_components` into the final score."""
 
     # Fresh-entrant bonus (less than 1 year since first seen)
     # fresh_bonus = 25 if profile.get("fresh") else 0.0  # ← commented out for now
+    return (base_score + momentum + geo_bonus + rising_bonus) * versatility_factor + multi_source_bonus + rank_bonus  # + fresh_bonus
+
+
+@njit(cache=True)
+def _score_core(
+    rating_z: float,
+    has_z: bool,
+    norm: float,
+    delta_sigma: float,
+    versatility: float,
+    geo_norm: float,
+    rank: float,
+    total_in_src: float,
+    is_atcoder: bool,
+    n_handles: int,
+) -> float:
+    """Return the final score for one set of inputs (components, then their combination)."""
+
+    return _combine_components(*_score_components(
+        rating_z, has_z, norm, delta_sigma, versatility, geo_norm, rank, total_in_src, is_atcoder, n_handles
+    ))
+
+
+@njit(cache=True, parallel=True)
+def _score_kernel(rating_z, has_z, norm, delta_sigma, versatility, geo_norm, rank, total_in_src, is_atcoder, n_handles):
+    out = np.empty(rating_z.shape[0], dtype=np.float64)
+    for i in prange(rating_z.shape[0]):
+        out[i] = _score_core(
+            rating_z[i], has_z[i], norm[i], delta_sigma[i], versatility[i],
+            geo_norm[i], rank[i], total_in_src[i], is_atcoder[i], n_handles[i],
+        )
+    return out
+
+
+def _score_arrays(rating_z, has_z, norm, delta_sigma, versatility, geo_norm, rank, total_in_src, is_atcoder, n_handles):
+    """NumPy equivalent of :func:`_score_kernel` (elementwise, no Python loop)."""
+
+    with np.errstate(over="ignore"):
+        sigmoid = 1 / (1 + np.exp(-rating_z))
+    base_score = np.where(has_z, sigmoid * 1000, np.clip(norm, 0.0, 1.0) * 1000)
+    multi_source_bonus = np.where(n_handles > 1, 50.0, 0.0)
+    momentum = delta_sigma * 50
+    versatility_factor = 1 + np.minimum(0.25, 0.1 * (versatility - 1))
+    safe_total = np.where(total_in_src > 0, total_in_src, 1.0)
+    rank_bonus = np.where(
+        is_atcoder & (rank != 0) & (total_in_src > 1),
+        (total_in_src - rank + 1) / safe_total * 300,
+        0.0,
+    )
+    geo_bonus = (geo_norm ** 2) * 100
+    rising_bonus = np.where(delta_sigma > 1.5, 50.0, 0.0)
+    return (base_score + momentum + geo_bonus + rising_bonus) * versatility_factor + multi_source_bonus + rank_bonus
+
+
+def _core_args(profile: Dict) -> Tuple:
+    """Unpack the numeric inputs of :func:`_score_core` from *profile*."""
+
+    # Each field is fetched once through a local binding of ``profile.get``
+    get = profile.get
+    is_atcoder = get("source") == "atcoder"
+    rank = get("rank")
+    # Codeforces "rank" is a title string ("grandmaster"), so only AtCoder ranks count.
+    numeric_rank = float(rank) if is_atcoder and isinstance(rank, (int, float)) else 0.0
+    return (
+        float(get("rating_z", 0.0)),
+        "rating_z" in profile,
+        float(get("norm", 0.0)),
+        float(get("delta_sigma", 0.0)),
+        float(get("versatility", 1)),
+        float(get("geo_norm", 0.0)),
+        numeric_rank,
+        float(get("total_in_src") or 0),
+        is_atcoder,
+        len(get("handles", {})),
+    )
+
+
+def score_batch(profiles: List[Dict]) -> np.ndarray:
+    """Return the interestingness score for every profile in one pass.
+
+    Fields are unpacked into NumPy arrays and scored by a Numba-parallel
+    kernel, or by vectorised NumPy operations when Numba is not installed.
+    Reason strings are not built here – call :func:`interestingness_score`
+    for the profiles that are reported.
+    """
 
-    score = (base_score + momentum + geo_bonus + rising_bonus) * versatility_factor + multi_source_bonus + rank_bonus  # + fresh_bonus
+    n = len(profiles)
+    columns = list(zip(*(_core_args(p) for p in profiles))) if n else [()] * 10
+    dtypes = (
+        np.float64, np.bool_, np.float64, np.float64, np.float64,
+        np.float64, np.float64, np.float64, np.bool_, np.int64,
+    )
+    arrays = [np.fromiter(col, dtype=dt, count=n) for col, dt in zip(columns, dtypes)]
+    if _HAVE_NUMBA:
+        return _score_kernel(*arrays)
+    return _score_arrays(*arrays)
+
+
+def interestingness_score(profile: Dict) -> Tuple[float, str]:
+    """Compute the interestingness score and reason for a profile.
 
-    source = profile.get("source", "unknown")
-    reason_parts = [
-        f"rating {int(profile.get('rating', 0))} on {source}",
-        f"pct {profile.get('norm',0)*100:.1f}%" if z is None else f"z {z:+.2f}",
-        f"Δσ {profile.get('delta_sigma',0):+.1f}" if momentum else None,
-        f"geo +{int(geo_bonus)} (top {geo_norm*100:.1f}% in {profile.get('country')})" if geo_bonus else None,
-        "Rising star" if rising_bonus else None,
-        f"rank bonus +{int(rank_bonus)}" if rank_bonus else None,
-        f"first seen {profile.get('first_seen')} (local snapshot)" if profile.get('first_seen') else None,
-        f"multi-platform ({profile.get('versatility')})" if profile.get('versatility',1)>1 else None,
-        # (f"fresh entrant (joined {profile.get('first_seen')} — {profile.get('first_seen_source')})" if fresh_bonus else None),
-    ]
+    Current heuristic:
+    - Base score = percentile + capped z-score.
+    - Bonus (10%) if the user comes from multiple sources (demonstrates versatility).
+    - The reason string explains the contributors.
+    """
 
-    reason = "\n  • " + "\n  • ".join(p for p in reason_parts if p)
+    args = _core_args(profile)
+    z = args[0] if args[1] else None
+    # Components are computed once: they give both the score and the reason
+    components = _score_components(*args)
+    _, momentum, geo_bonus, rising_bonus, _, _, rank_bonus = components
+    score = float(_combine_components(*components))
+    geo_norm = args[5]
+
+    get = profile.get
+    source = get("source", "unknown")
+    delta_sigma = args[3]
+    versatility = get("versatility", 1)
+    first_seen = get("first_seen")
+
+    # Only build the fragments whose contributor actually fired
+    reason_parts = [f"rating {int(get('rating', 0))} on {source}"]
+    reason_parts.append(f"pct {get('norm', 0)*100:.1f}%" if z is None else f"z {z:+.2f}")
+    if momentum:
+        reason_parts.append(f"Δσ {delta_sigma:+.1f}")
+    if geo_bonus:
+        reason_parts.append(f"geo +{int(geo_bonus)} (top {geo_norm*100:.1f}% in {get('country')})")
+    if rising_bonus:
+        reason_parts.append("Rising star")
+    if rank_bonus:
+        reason_parts.append(f"rank bonus +{int(rank_bonus)}")
+    if first_seen:
+        reason_parts.append(f"first seen {first_seen} (local snapshot)")
+    if versatility > 1:
+        reason_parts.append(f"multi-platform ({versatility})")
+    # if fresh_bonus:
+    #     reason_parts.append(f"fresh entrant (joined {first_seen} — {get('first_seen_source')})")
+
+    reason = "\n  • " + "\n  • ".join(reason_parts)
 
     return score, reason
 
 
-__all__ = ["interestingness_score"] 
\ No newline at end of file
+__all__ = ["interestingness_score", "score_batch"]
@@ -2,20 +2,163 @@
 
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+import hashlib
 import requests
 import logging
 import re
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
 
-from . import cache
+# Optional Lexbor parser – the lxml XPath path below is used when selectolax is absent
+try:
+    from selectolax.lexbor import LexborHTMLParser  # type: ignore
+
+    _HAVE_SELECTOLAX = True
+except ImportError:  # pragma: no cover – selectolax not installed
+    _HAVE_SELECTOLAX = False
+
+from .. import cache
 
 
 ATCODER_RANKING_URL = "https://atcoder.jp/ranking/all?lang=en&contest_type=algo&page=1"
 
 logger = logging.getLogger(__name__)
 
+# One pooled session for every page – avoids a fresh TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+    ),
+)
+_SESSION.headers.update({"User-Agent": "Mozilla/5.0 (compatible; TalentIdentificationBot/0.1)"})
+
+# Persistent-cache namespace for per-page validators (ETag / Last-Modified / body
+# hash) and the rows parsed from that page, so unchanged pages skip parsing.
+# Rewritten on every run with just the pages fetched, so it stays bounded.
+_PAGE_CACHE_NS = "atcoder_pages"
+
+# Compiled once – these run for every table row
+_COUNTRY_HREF_RE = re.compile(r"f\.Country=([A-Za-z]{2})")
+_RANK_RE = re.compile(r"\d+")
+
+# Compiled XPath expressions (evaluated in C by libxml2)
+_FIRST_TABLE = etree.XPath("(//table)[1]")
+_DATA_ROWS = etree.XPath(".//tr[td and not(th)]")
+_CELLS = etree.XPath("./td")
+_USERNAME_LINK = etree.XPath('.//a[contains(concat(" ", normalize-space(@class), " "), " username ")]')
+_COUNTRY_HREFS = etree.XPath('.//a[contains(@href, "f.Country=")]/@href')
+
+
+def _text(el) -> str:
+    """Concatenate stripped text nodes of *el* (same as bs4 ``get_text(strip=True)``)."""
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _user_dict(handle: str, country: Optional[str], rating_text: str, rank_val: int) -> Dict:
+    try:
+        rating = int(rating_text)
+    except ValueError:
+        rating = 0
+    return {
+        "name": handle,  # AtCoder usually has no real name separate from handle
+        "handle": handle,
+        "country": country,
+        "rating": rating,
+        "rank": rank_val,
+        "source": "atcoder",
+    }
+
+
+def _parse_page_lexbor(content: bytes) -> Optional[List[Dict]]:
+    """Lexbor (selectolax) version of :func:`_parse_page_lxml`."""
+
+    table = LexborHTMLParser(content).css_first("table")
+    if table is None:
+        return None
+
+    users: List[Dict] = []
+    for row in table.css("tr"):
+        # Single pass over the row's children: header rows (any <th>) are skipped
+        cols = []
+        is_header = False
+        for cell in row.iter():
+            if cell.tag == "th":
+                is_header = True
+                break
+            if cell.tag == "td":
+                cols.append(cell)
+        if is_header or len(cols) < 4:
+            continue
+        user_td = cols[1]
+        username_link = user_td.css_first("a.username")
+        if username_link is None:
+            continue
+
+        country = None
+        for link in user_td.css('a[href*="f.Country="]'):
+            m_flag = _COUNTRY_HREF_RE.search(link.attributes.get("href") or "")
+            if m_flag:
+                country = m_flag.group(1).upper()
+                break
+
+        m = _RANK_RE.search(cols[0].text(strip=True))
+        if not m:
+            continue
+
+        users.append(_user_dict(
+            username_link.text(strip=True), country, cols[3].text(strip=True), int(m.group()),
+        ))
+    return users
+
+
+def _parse_page_lxml(content: bytes) -> Optional[List[Dict]]:
+    """Parse one ranking page into user dicts (``None`` if the page has no table)."""
+
+    tree = lxml.html.fromstring(content)
+    # AtCoder's HTML occasionally changes class names; grab the first data table on the page.
+    tables = _FIRST_TABLE(tree)
+    if not tables:
+        return None
+
+    users: List[Dict] = []
+    for row in _DATA_ROWS(tables[0]):
+        cols = _CELLS(row)
+        if len(cols) < 4:
+            continue
+        user_td = cols[1]
+        username_links = _USERNAME_LINK(user_td)
+        if not username_links:
+            continue
+
+        # Country from the flag anchor's query param (e.g., f.Country=BY)
+        country = None
+        for href in _COUNTRY_HREFS(user_td):
+            m_flag = _COUNTRY_HREF_RE.search(href)
+            if m_flag:
+                country = m_flag.group(1).upper()
+                break
+
+        # Rank (numeric). Some rows may include "-" for unrated users – skip them.
+        m = _RANK_RE.search(_text(cols[0]))
+        if not m:
+            continue
+
+        users.append(_user_dict(
+            _text(username_links[0]), country, _text(cols[3]), int(m.group()),
+        ))
+    return users
+
+
+_parse_page = _parse_page_lexbor if _HAVE_SELECTOLAX else _parse_page_lxml
+
 
 def fetch_ratings(limit: int = 1000) -> List[Dict]:
     """Fetch ratings for top AtCoder users by scraping the ranking page.
@@ -38,70 +181,46 @@ def fetch_ratings(limit: int = 1000) -> List[Dict]:
         return cached[:limit]
 
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; TalentIdentificationBot/0.1)"}
+        known_pages = cache.get_persistent(_PAGE_CACHE_NS)
+        fresh_pages: Dict[str, Dict] = {}
         users: List[Dict] = []
         page = 1
         while len(users) < limit:
             url = f"https://atcoder.jp/ranking/all?lang=en&contest_type=algo&page={page}"
+            known = known_pages.get(url)
+            headers = {}
+            if known:
+                if known.get("etag"):
+                    headers["If-None-Match"] = known["etag"]
+                if known.get("last_modified"):
+                    headers["If-Modified-Since"] = known["last_modified"]
             logger.debug("Requesting %s", url)
-            resp = requests.get(url, timeout=15, headers=headers)
+            resp = _SESSION.get(url, timeout=15, headers=headers)
             if resp.status_code == 404:
                 break  # no more pages
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "lxml")
-            # Save soup results to a text file for debugging
-            with open(f"atcoder_page_{page}.txt", "w", encoding="utf-8") as f:
-                f.write(soup.prettify())
-            # AtCoder's HTML occasionally changes class names; grab the first data table on the page.
-            table = soup.find("table")
-            if table is None:
-                break
+            if resp.status_code == 304 and known:
+                logger.debug("AtCoder page %d not modified; reusing parsed rows", page)
+                page_users = known["users"]
+                fresh_pages[url] = known
+            else:
+                resp.raise_for_status()
+                logger.debug("AtCoder page %d: %d bytes", page, len(resp.content))
+                body_hash = hashlib.blake2b(resp.content, digest_size=16).hexdigest()
+                if known and known.get("body_hash") == body_hash:
+                    page_users = known["users"]  # server ignored the validators but nothing changed
+                else:
+                    page_users = _parse_page(resp.content)
+                    if page_users is None:
+                        break
+                fresh_pages[url] = {
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "body_hash": body_hash,
+                    "users": page_users,
+                }
 
             start_count = len(users)
-            for row in table.find_all("tr"):
-                # Skip header rows that use <th>
-                if row.find("th") is not None:
-                    continue
-                cols = row.find_all("td")
-                if len(cols) < 4:
-                    continue
-                user_td = cols[1]
-                username_link = user_td.find("a", class_="username")
-                if username_link is None:
-                    continue
-
-                # Country from the flag anchor's query param (e.g., f.Country=BY)
-                country = None
-                flag_anchor = user_td.find("a", href=re.compile(r"f\.Country="))
-                if flag_anchor and flag_anchor.get("href"):
-                    m_flag = re.search(r"f\.Country=([A-Za-z]{2})", flag_anchor["href"])
-                    if m_flag:
-                        country = m_flag.group(1).upper()
-
-                # Rank (numeric). Some rows may include "-" for unrated users – skip them.
-                rank_text = cols[0].get_text(strip=True)
-                m = re.search(r"\d+", rank_text)
-                if not m:
-                    continue
-                rank_val = int(m.group())
-
-                handle = username_link.get_text(strip=True)
-
-                try:
-                    rating = int(cols[3].get_text(strip=True))
-                except ValueError:
-                    rating = 0
-
-                users.append({
-                    "name": handle,  # AtCoder usually has no real name separate from handle
-                    "handle": handle,
-                    "country": country,
-                    "rating": rating,
-                    "rank": rank_val,
-                    "source": "atcoder",
-                })
-                if len(users) >= limit:
-                    break
+            users.extend(page_users[: limit - len(users)])
 
             # If this page added no new users, assume we've reached the end.
             if len(users) == start_count:
@@ -109,6 +228,7 @@ def fetch_ratings(limit: int = 1000) -> List[Dict]:
             page += 1
             if page % 5 == 0:
                 logger.debug("AtCoder scraping progress: %d users …", len(users))
+        cache.set_persistent(_PAGE_CACHE_NS, fresh_pages, replace=True)
         cache.set_cached("atcoder", users)
         logger.info("Fetched %d AtCoder users", len(users))
         return users[:limit]
@@ -6,12 +6,14 @@ reuse the cached payload and make the pipeline idempotent.
 
 from __future__ import annotations
 
-import json
 import os
+import threading
 from datetime import date
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import orjson
+
 
 CATALOG_PATH = Path(__file__).parent / "catalog.json"
 
@@ -20,21 +22,62 @@ CATALOG_PATH = Path(__file__).parent / "catalog.json"
 SKIP_CACHE = os.getenv("TI_SKIP_CACHE", "0").lower() in {"1", "true", "yes"}
 
 
+# Sources are ingested concurrently, so every read-modify-write of the catalog
+# is serialised through this lock.
+_LOCK = threading.RLock()
+
+# Parsed catalog kept for the life of the process, tagged with the file
+# metadata it was read from so external edits still trigger a re-parse.
+_CATALOG: Optional[Dict[str, Any]] = None
+_CATALOG_STAMP: Optional[tuple] = None
+
+
+def _catalog_stamp() -> tuple:
+    """Identify the current catalog file version (path, mtime, size)."""
+    try:
+        st = CATALOG_PATH.stat()
+    except FileNotFoundError:
+        return (CATALOG_PATH, None)
+    return (CATALOG_PATH, st.st_mtime_ns, st.st_size)
+
+
 def _load_catalog() -> Dict[str, Any]:
-    """Return the full JSON catalog ({} if missing or corrupted)."""
+    """Return the full JSON catalog ({} if missing or corrupted).
 
-    if CATALOG_PATH.exists():
+    The parsed catalog is memoised and only re-read when the file changes on
+    disk; treat the returned mapping as read-only.
+    """
+
+    global _CATALOG, _CATALOG_STAMP
+
+    stamp = _catalog_stamp()
+    if _CATALOG is not None and stamp == _CATALOG_STAMP:
+        return _CATALOG
+
+    catalog: Dict[str, Any] = {}
+    if stamp[1] is not None:
         try:
-            return json.loads(CATALOG_PATH.read_text())
-        except json.JSONDecodeError:
+            catalog = orjson.loads(CATALOG_PATH.read_bytes())
+        except orjson.JSONDecodeError:
             pass
-    return {}
+    _CATALOG, _CATALOG_STAMP = catalog, stamp
+    return catalog
 
 
 def _save_catalog(catalog: Dict[str, Any]) -> None:
-    """Write *catalog* back to disk (pretty-printed for readability)."""
+    """Write *catalog* back to disk atomically.
+
+    The file is compact JSON (``python -m json.tool`` pretty-prints it); it is
+    written to a temporary sibling and renamed so a crash never leaves a
+    half-written catalog behind.
+    """
+
+    global _CATALOG, _CATALOG_STAMP
 
-    CATALOG_PATH.write_text(json.dumps(catalog, ensure_ascii=False, indent=2))
+    tmp_path = CATALOG_PATH.with_suffix(".json.tmp")
+    tmp_path.write_bytes(orjson.dumps(catalog, option=orjson.OPT_NON_STR_KEYS))
+    os.replace(tmp_path, CATALOG_PATH)
+    _CATALOG, _CATALOG_STAMP = catalog, _catalog_stamp()
 
 
 def get_cached(source: str) -> Optional[List[Dict]]:
@@ -44,8 +87,12 @@ def get_cached(source: str) -> Optional[List[Dict]]:
         return None
 
     today_iso = date.today().isoformat()
-    catalog = _load_catalog()
-    return catalog.get(today_iso, {}).get(source)
+    with _LOCK:
+        data = _load_catalog().get(today_iso, {}).get(source)
+        if data is None:
+            return None
+        # Hand out copies so callers enriching the records don't alter the memoised catalog
+        return [dict(rec) if isinstance(rec, dict) else rec for rec in data]
 
 
 def set_cached(source: str, data: List[Dict]) -> None:
@@ -67,14 +114,49 @@ def set_cached(source: str, data: List[Dict]) -> None:
         return
 
     today_iso = date.today().isoformat()
-    catalog = _load_catalog()
+    with _LOCK:
+        catalog = _load_catalog()
+        catalog.setdefault(today_iso, {})[source] = [dict(rec) if isinstance(rec, dict) else rec for rec in data]
+        _save_catalog(catalog)
 
-    catalog.setdefault(today_iso, {})[source] = data
 
-    _save_catalog(catalog)
+def get_persistent(namespace: str) -> Dict[str, Any]:
+    """Return the non-expiring key/value store *namespace* ({} if absent/disabled).
+
+    Unlike the daily buckets these entries survive across days – use them for
+    facts that never change (e.g. account registration dates).
+    """
+
+    if SKIP_CACHE:
+        return {}
+
+    with _LOCK:
+        return dict(_load_catalog().get("persistent", {}).get(namespace, {}))
+
+
+def set_persistent(namespace: str, data: Dict[str, Any], replace: bool = False) -> None:
+    """Merge *data* into the persistent store *namespace* in one write.
+
+    With ``replace=True`` the namespace is overwritten instead, so entries not
+    in *data* are dropped – use it for stores that must not grow across runs.
+    """
+
+    if SKIP_CACHE or not data:
+        return
+
+    with _LOCK:
+        catalog = _load_catalog()
+        store = catalog.setdefault("persistent", {})
+        if replace:
+            store[namespace] = dict(data)
+        else:
+            store.setdefault(namespace, {}).update(data)
+        _save_catalog(catalog)
 
 
 __all__ = [
     "get_cached",
+    "get_persistent",
     "set_cached",
+    "set_persistent",
 ] 
\ No newline at end of file
@@ -3,10 +3,23 @@ Module for pulling Codeforces ratings and normalising them.
 """
 
 from typing import List, Dict, Optional
+import orjson
+import pandas as pd
 import requests
 import logging
 from datetime import datetime
 from functools import lru_cache
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional incremental JSON parser – the whole body is decoded with orjson when absent
+try:
+    import ijson  # type: ignore
+
+    _HAVE_IJSON = True
+except ImportError:  # pragma: no cover – ijson not installed
+    _HAVE_IJSON = False
 
 from . import cache
 
@@ -15,15 +28,29 @@ logger = logging.getLogger(__name__)
 # Base URL for Codeforces API
 CODEFORCES_API_URL = "https://codeforces.com/api"
 
+# Shared keep-alive session so repeated API calls reuse one connection
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+    ),
+)
+
 # Cached registration date lookup
 
 @lru_cache(maxsize=None)
 def _get_reg_date(handle: str) -> Optional[str]:
     """Return Codeforces registration date (ISO) for *handle*."""
     try:
-        resp = requests.get(f"{CODEFORCES_API_URL}/user.info?handles={handle}", timeout=10)
-        if resp.status_code == 200 and resp.json().get("status") == "OK":
-            info = resp.json()["result"][0]
+        resp = _SESSION.get(f"{CODEFORCES_API_URL}/user.info?handles={handle}", timeout=10)
+        if resp.status_code != 200:
+            return None
+        payload = orjson.loads(resp.content)
+        if payload.get("status") == "OK":
+            info = payload["result"][0]
             ts = info.get("registrationTimeSeconds")
             if ts:
                 return datetime.utcfromtimestamp(ts).date().isoformat()
@@ -31,6 +58,28 @@ def _get_reg_date(handle: str) -> Optional[str]:
         pass
     return None
 
+
+def _read_rated_list(resp: requests.Response, limit: int) -> List[Dict]:
+    """Return the first *limit* users of a streamed user.ratedList response.
+
+    With ijson the ``result`` array is parsed item by item straight off the
+    socket and reading stops after *limit* users; otherwise the full body is
+    downloaded and decoded.
+    """
+    if _HAVE_IJSON:
+        resp.raw.decode_content = True  # let urllib3 undo gzip before ijson reads
+        users = list(islice(ijson.items(resp.raw, "result.item", use_float=True), limit))
+        # A FAILED response has no "result" array at all
+        if limit and not users:
+            raise ValueError("Unexpected API status")
+        return users
+
+    data = orjson.loads(resp.content)
+    if data.get("status") != "OK":
+        raise ValueError("Unexpected API status")
+    return data.get("result", [])[:limit]
+
+
 # Fetch top rated Codeforces users (active only) – limited for performance
 # Docs: https://codeforces.com/apiHelp/methods#user.ratedList
 
@@ -58,39 +107,30 @@ def fetch_ratings(limit: int = 300) -> List[Dict]:
 
     try:
         logger.debug("Requesting %s", endpoint)
-        resp = requests.get(endpoint, timeout=15)
-        logger.debug("Codeforces response status %s", resp.status_code)
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("status") != "OK":
-            raise ValueError("Unexpected API status")
-        users = data.get("result", [])[:limit]
-
-        normalised: List[Dict] = []
-
-        for u in tqdm(users, desc="Codeforces reg-date", unit="user"):
-            name_parts = []
-            if u.get("firstName"):
-                name_parts.append(u["firstName"].strip())
-            if u.get("lastName"):
-                name_parts.append(u["lastName"].strip())
-            name = " ".join(name_parts) if name_parts else u["handle"]
-
-            # first_seen = _get_reg_date(u["handle"])  # commented out – join-date disabled
-            first_seen = None
-
-            normalised.append(
-                {
-                    "name": name,
-                    "handle": u["handle"],
-                    "country": u.get("country"),
-                    "rating": u.get("rating", 0),
-                    "rank": u.get("rank"),
-                    "source": "codeforces",
-                    # "platform_first_seen": first_seen,
-                    "platform_first_seen": None
-                }
-            )
+        # Streamed so parsing overlaps the transfer (and the socket closes early at *limit*)
+        with _SESSION.get(endpoint, stream=True, timeout=30) as resp:
+            logger.debug("Codeforces response status %s", resp.status_code)
+            resp.raise_for_status()
+            users = _read_rated_list(resp, limit)
+
+        # Normalise every user in one pass with pandas' string kernels
+        df = pd.DataFrame(users).reindex(columns=["handle", "firstName", "lastName", "country", "rating", "rank"])
+        full_name = (
+            df["firstName"].fillna("").astype(str).str.strip()
+            + " "
+            + df["lastName"].fillna("").astype(str).str.strip()
+        ).str.strip()
+        df["name"] = full_name.where(full_name != "", df["handle"])
+        df["rating"] = df["rating"].fillna(0).astype(int)
+
+        # df["platform_first_seen"] = df["handle"].map(_get_reg_date)  # commented out – join-date disabled
+
+        out = df[["name", "handle", "country", "rating", "rank"]].astype(object)
+        normalised: List[Dict] = (
+            out.where(out.notna(), None)
+            .assign(source="codeforces", platform_first_seen=None)
+            .to_dict("records")
+        )
 
         # Cache full list for today
         cache.set_cached("codeforces", normalised)
@@ -117,11 +157,4 @@ def normalise_ratings(raw_ratings: List[Dict]) -> List[Dict]:
     # TODO: Implement normalisation logic
     return raw_ratings
 
-# Optional progress bar
-try:
-    from tqdm import tqdm  # type: ignore
-except ImportError:  # pragma: no cover – tqdm not installed
-    def tqdm(iterable, **kwargs):  # type: ignore
-        return iterable
-
 __all__ = ["fetch_ratings", "normalise_ratings"] 
\ No newline at end of file
@@ -28,18 +28,31 @@ import logging
 import math
 import os
 import threading
+from functools import lru_cache
 from typing import Dict, List, Optional
 from datetime import datetime
 import re
 
 import cloudscraper
+import orjson
 import time
-from playwright.sync_api import sync_playwright
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from . import cache
 
+# Optional HTTP/2 client for the pagination fan-out (needs httpx + h2); the
+# cloudscraper session is used for everything when it is absent
+try:
+    import httpx  # type: ignore
+    import h2  # type: ignore  # noqa: F401 – required by httpx for http2=True
+
+    _HAVE_HTTP2 = True
+except ImportError:  # pragma: no cover – httpx[http2] not installed
+    _HAVE_HTTP2 = False
+
 # Optional progress bar
 try:
     from tqdm import tqdm  # type: ignore
@@ -61,11 +74,38 @@ logger = logging.getLogger(__name__)
 _API_URL = "https://leetcode.com/contest/api/ranking/{slug}/"
 _MAX_PER_PAGE = 25  # LeetCode always returns 25 ranks per page
 _GRAPHQL_ENDPOINT = "https://leetcode.com/graphql"
-_MAX_WORKERS = 10  # cap concurrent requests to stay within urllib3 default pool size
+_POOL_CONNECTIONS = 32  # distinct hosts kept in the scraper's urllib3 pool manager
+_POOL_MAXSIZE = 64  # keep-alive connections per host
+# Workers use a quarter of the pool so other requests on the same scraper
+# never hit urllib3's "connection pool is full" path
+_MAX_WORKERS = _POOL_MAXSIZE // 4
+_ALL_CONTESTS_NS = "leetcode_all_contests"  # persistent-cache namespace for the contest list
+_ALL_CONTESTS_TTL = 3600  # seconds before the contest list is re-fetched
 
 # Single scraper instance (handles Cloudflare automatically)
 scraper = cloudscraper.create_scraper()
 
+# Mount adapters with enlarged connection pools.  https:// keeps cloudscraper's
+# CipherSuiteAdapter (an HTTPAdapter with the TLS fingerprint Cloudflare
+# expects), built with the same settings create_scraper() used.  Retries cover
+# connection errors only – Cloudflare challenges arrive as 403/503 responses
+# that cloudscraper must see.
+_RETRY = Retry(total=3, backoff_factor=0.3)
+scraper.mount(
+    "https://",
+    cloudscraper.CipherSuiteAdapter(
+        cipherSuite=scraper.cipherSuite,
+        ecdhCurve=scraper.ecdhCurve,
+        server_hostname=scraper.server_hostname,
+        source_address=scraper.source_address,
+        ssl_context=scraper.ssl_context,
+        pool_connections=_POOL_CONNECTIONS,
+        pool_maxsize=_POOL_MAXSIZE,
+        max_retries=_RETRY,
+    ),
+)
+scraper.mount("http://", HTTPAdapter(pool_connections=_POOL_CONNECTIONS, pool_maxsize=_POOL_MAXSIZE, max_retries=_RETRY))
+
 # ---------------------------------------------------------------------------
 # Optional authentication cookies (improves success rate, enables joinDate)
 # ---------------------------------------------------------------------------
@@ -108,7 +148,7 @@ def _get_join_date(username: str) -> Optional[str]:
             timeout=15,
         )
         if resp.status_code == 200:
-            data = resp.json()
+            data = orjson.loads(resp.content)
             join_ts = (
                 data.get("data", {})
                 .get("matchedUser", {})
@@ -127,7 +167,7 @@ def _get_join_date(username: str) -> Optional[str]:
         rest_url = f"https://leetcode.com/api/users/{username}/"
         r = scraper.get(rest_url, cookies=_AUTH_COOKIES, timeout=10)  # reuse cloudscraper to bypass CF
         if r.status_code == 200:
-            jd = r.json().get("joinDate")
+            jd = orjson.loads(r.content).get("joinDate")
             if jd:
                 iso_date = datetime.utcfromtimestamp(int(jd)).date().isoformat()
                 _JOIN_DATE_CACHE[username] = iso_date
@@ -168,118 +208,181 @@ def _get_join_date_html(username: str) -> Optional[str]:
 # Helpers
 # ----------------------------------------------------------------------------
 
-def _fetch_page(slug: str, page: int, out: List[Dict], lock: threading.Lock) -> None:
-    """Worker that fetches a single pagination page and extends *out*."""
+def _ranking_row(user: Dict) -> Dict:
+    """Normalise one ``total_rank`` entry of the ranking API."""
+
+    get = user.get
+    username = user["username"]
+    rating = get("rating")
+    return {
+        "name": username,
+        "handle": username,
+        "country": get("country_code"),
+        "rating": rating if rating is not None else get("score", 0),
+        "rank": user["rank"],
+        "score": get("score"),
+        "source": "leetcode",
+        # "platform_first_seen": _get_join_date(username),
+        "platform_first_seen": None,  # per-platform join dates disabled; using local first-seen tracking instead
+    }
+
+
+def _open_http2_client():
+    """Return an HTTP/2 client carrying the scraper's cookies, or *None*.
+
+    Called after the first page succeeded through cloudscraper, so any
+    Cloudflare clearance cookie is already in ``scraper.cookies``; the page
+    requests then share one multiplexed connection instead of one TLS
+    connection per worker.
+    """
+
+    if not _HAVE_HTTP2:
+        return None
+    return httpx.Client(
+        http2=True,
+        cookies={c.name: c.value for c in scraper.cookies},
+        headers={"User-Agent": scraper.headers.get("User-Agent", "Mozilla/5.0")},
+        limits=httpx.Limits(max_connections=_MAX_WORKERS),
+    )
+
+
+def _fetch_page(
+    slug: str,
+    page: int,
+    out: List[Optional[Dict]],
+    enough: threading.Event,
+    client=None,
+) -> int:
+    """Worker that fetches a single pagination page into its slots of *out*.
+
+    Page *page* owns ``out[(page-1)*25 : page*25]``, so workers never write the
+    same slot and rows land in rank order without a lock or a final sort.
+    Workers that start after *enough* is set skip the request.  *client* is an
+    optional HTTP/2 client (see :func:`_open_http2_client`); if Cloudflare
+    rejects it the page is retried through the scraper.  Returns the number
+    of rows written.
+    """
+
+    if enough.is_set():
+        return 0
 
     url = _API_URL.format(slug=slug)
     params = {"pagination": page, "region": "global"}
 
     try:
-        resp = scraper.get(url, params=params, timeout=20)
+        resp = (client or scraper).get(url, params=params, timeout=20)
+        if client is not None and resp.status_code in (403, 503):
+            resp = scraper.get(url, params=params, timeout=20)
         if resp.status_code != 200:
             logger.warning("LeetCode page %d for %s returned %s", page, slug, resp.status_code)
-            return
-        data = resp.json()
+            return 0
+        data = orjson.loads(resp.content)
     except Exception:  # pragma: no cover – network issues, invalid JSON, etc.
         logger.exception("Failed to fetch LeetCode page %d for %s", page, slug)
-        return
-
-    ranks = data.get("total_rank", [])
-    rows: List[Dict] = []
-    for user in ranks:
-        rows.append({
-            "name": user["username"],
-            "handle": user["username"],
-            "country": user.get("country_code"),
-            "rating": user.get("rank") if user.get("rank") is not None else user.get("score", 0),
-            "rank": user["rank"],
-            "score": user.get("score"),
-            "source": "leetcode",
-            # "platform_first_seen": _get_join_date(user["username"]),
-            "platform_first_seen": None,  # per-platform join dates disabled; using local first-seen tracking instead
-        })
-
-    with lock:
-        out.extend(rows)
+        return 0
 
+    rows = [_ranking_row(user) for user in data.get("total_rank", [])[:_MAX_PER_PAGE]]
+    offset = (page - 1) * _MAX_PER_PAGE
+    out[offset:offset + len(rows)] = rows
+    return len(rows)
 
-def _get_latest_slug() -> Optional[str]:
-    """Return titleSlug of the most recent past or upcoming contest."""
+
+def _get_all_contests() -> Optional[List[Dict]]:
+    """Return every contest (titleSlug, startTime), newest first.
+
+    The list changes at most weekly, so the response is kept in the
+    persistent cache for ``_ALL_CONTESTS_TTL`` seconds.
+    """
+
+    stored = cache.get_persistent(_ALL_CONTESTS_NS)
+    if stored and time.time() - stored.get("fetched_at", 0) < _ALL_CONTESTS_TTL:
+        return stored["contests"]
 
     query = """query { allContests { titleSlug startTime } }"""
+    resp = requests.post(
+        _GRAPHQL_ENDPOINT,
+        json={"query": query},
+        headers={"Content-Type": "application/json", "User-Agent": "Mozilla/5.0"},
+        cookies=_AUTH_COOKIES,
+        timeout=20,
+    )
+    if resp.status_code != 200:
+        return None
+    contests = orjson.loads(resp.content)["data"]["allContests"]
+    # Sort descending by startTime (epoch seconds)
+    contests.sort(key=lambda c: c["startTime"], reverse=True)
+    cache.set_persistent(_ALL_CONTESTS_NS, {"fetched_at": time.time(), "contests": contests})
+    return contests
+
+
+def _get_latest_slug() -> Optional[str]:
+    """Return titleSlug of the most recent past or upcoming contest.
+
+    Memoised in-process per ``_ALL_CONTESTS_TTL`` window; failed lookups are
+    not remembered so the next call retries.
+    """
+
+    slug = _get_latest_slug_cached(int(time.time() // _ALL_CONTESTS_TTL))
+    if slug is None:
+        _get_latest_slug_cached.cache_clear()
+    return slug
+
+
+@lru_cache(maxsize=1)
+def _get_latest_slug_cached(bucket: int) -> Optional[str]:
+    """Resolve the latest slug once per time *bucket* (see :func:`_get_latest_slug`)."""
+
     try:
-        resp = requests.post(
-            _GRAPHQL_ENDPOINT,
-            json={"query": query},
-            headers={"Content-Type": "application/json", "User-Agent": "Mozilla/5.0"},
-            cookies=_AUTH_COOKIES,
-            timeout=20,
-        )
-        if resp.status_code != 200:
+        contests = _get_all_contests()
+        if contests is None:
             return None
-        contests = resp.json()["data"]["allContests"]
-        # Sort descending by startTime (epoch seconds)
-        contests.sort(key=lambda c: c["startTime"], reverse=True)
         return contests[3]["titleSlug"] if contests else None
     except Exception as e:
         logger.exception("Failed to fetch LeetCode latest contest slug: %s", e)
         return None
 
 
-def _get_cf_cookie() -> Optional[dict[str, str]]:
-    with sync_playwright() as p:
-        browser = p.firefox.launch(headless=True)
-        context = browser.new_context(storage_state=None)
-        page = context.new_page()
-        page.goto(f"https://leetcode.com/contest/{slug}/ranking", timeout=60000)
-        page.wait_for_selector("table")       # ranking table loaded
-        cookies = { c["name"]: c["value"] for c in context.cookies() }
-        browser.close()
-        return cookies
-
-
 # ---------------------------------------------------------------------------
 # Optional Playwright clearance (rarely needed because cloudscraper usually succeeds).
+# Playwright is imported on first use so the common cloudscraper path never
+# pays for loading it.
 # ---------------------------------------------------------------------------
 
-try:
-    from playwright.sync_api import sync_playwright  # type: ignore
-
-    def _solve_cloudflare(slug: str) -> Optional[dict[str, str]]:  # pragma: no cover
-        """Launch a headless Firefox instance, load the ranking page once and
-        return the resulting cookies (includes cf_clearance).  Requires
-        Playwright with browsers installed (`playwright install firefox`)."""
-
-        logger.info("Playwright: launching browser to satisfy Cloudflare challenge …")
-        try:
-            with sync_playwright() as p:
-                browser = p.firefox.launch(headless=True)
-                ctx = browser.new_context()
-                page = ctx.new_page()
-                page.goto(f"https://leetcode.com/contest/{slug}/ranking", timeout=60000)
-
-                # Poll cookies for up to 30 s until Cloudflare sets cf_clearance
-                ck: dict[str, str] = {}
-                for _ in range(30):
-                    all_cookies = {c["name"]: c["value"] for c in ctx.cookies()}
-                    if "cf_clearance" in all_cookies:
-                        ck["cf_clearance"] = all_cookies["cf_clearance"]
-                        break
-                    page.wait_for_timeout(1000)  # 1 s
-                # optional small extra wait to ensure challenge finished
-                browser.close()
-                if ck:
-                    logger.info("Playwright: obtained cf_clearance cookie")
-                else:
-                    logger.warning("Playwright: cf_clearance cookie not found after page load")
-                return ck or None
-        except Exception:
-            logger.exception("Playwright failed to solve Cloudflare challenge")
-            return None
+def _solve_cloudflare(slug: str) -> Optional[dict[str, str]]:  # pragma: no cover
+    """Launch a headless Firefox instance, load the ranking page once and
+    return the resulting cookies (includes cf_clearance).  Requires
+    Playwright with browsers installed (`playwright install firefox`)."""
 
-except ImportError:  # Playwright not installed
+    try:
+        from playwright.sync_api import sync_playwright  # type: ignore
+    except ImportError:  # Playwright not installed
+        return None
 
-    def _solve_cloudflare(slug: str) -> None:  # type: ignore
+    logger.info("Playwright: launching browser to satisfy Cloudflare challenge …")
+    try:
+        with sync_playwright() as p:
+            browser = p.firefox.launch(headless=True)
+            ctx = browser.new_context()
+            page = ctx.new_page()
+            page.goto(f"https://leetcode.com/contest/{slug}/ranking", timeout=60000)
+
+            # Poll cookies for up to 30 s until Cloudflare sets cf_clearance
+            ck: dict[str, str] = {}
+            for _ in range(30):
+                all_cookies = {c["name"]: c["value"] for c in ctx.cookies()}
+                if "cf_clearance" in all_cookies:
+                    ck["cf_clearance"] = all_cookies["cf_clearance"]
+                    break
+                page.wait_for_timeout(1000)  # 1 s
+            # optional small extra wait to ensure challenge finished
+            browser.close()
+            if ck:
+                logger.info("Playwright: obtained cf_clearance cookie")
+            else:
+                logger.warning("Playwright: cf_clearance cookie not found after page load")
+            return ck or None
+    except Exception:
+        logger.exception("Playwright failed to solve Cloudflare challenge")
         return None
 
 
@@ -319,7 +422,7 @@ def fetch_contest_ranking(slug: Optional[str] = None, limit: int = 300) -> List[
         if first.status_code != 200:
             logger.warning("LeetCode initial request failed with status %s", first.status_code)
             return []
-        pdata = first.json()
+        pdata = orjson.loads(first.content)
     except Exception:  # pragma: no cover
         logger.exception("Failed to fetch initial LeetCode page for %s", slug)
         return []
@@ -327,44 +430,47 @@ def fetch_contest_ranking(slug: Optional[str] = None, limit: int = 300) -> List[
     user_total = int(pdata.get("user_num", 0))
     max_page = math.ceil(user_total / _MAX_PER_PAGE)
 
-    results: List[Dict] = []
-    lock = threading.Lock()
-
-    # Page-1 results have already been downloaded – process them immediately
-    for u in pdata.get("total_rank", []):
-        results.append({
-            "name": u["username"],
-            "handle": u["username"],
-            "country": u.get("country_code"),
-            "rating": u.get("rating") if u.get("rating") is not None else u.get("score", 0),
-            "rank": u["rank"],
-            "score": u.get("score"),
-            "source": "leetcode",
-            # "platform_first_seen": _get_join_date(u["username"]),
-            "platform_first_seen": None,  # per-platform join dates disabled; using local first-seen tracking instead
-        })
-        if len(results) >= limit:
-            cache.set_cached(cache_key, results)
-            return results[:limit]
+    # Page-1 results have already been downloaded – process them immediately.
+    # Capped like every other page so it can never spill into page 2's slots.
+    first_rows = [_ranking_row(u) for u in pdata.get("total_rank", [])[:_MAX_PER_PAGE]]
+    if len(first_rows) >= limit:
+        cache.set_cached(cache_key, first_rows)
+        return first_rows[:limit]
 
     # Determine how many additional pages we actually need to reach *limit*
     pages_needed = min(max_page, math.ceil(limit / _MAX_PER_PAGE))
 
     remaining_pages = list(range(2, pages_needed + 1))
 
+    # One slot per rank position; each page fills its own disjoint range
+    results: List[Optional[Dict]] = [None] * (max(pages_needed, 1) * _MAX_PER_PAGE)
+    results[:len(first_rows)] = first_rows
+    filled = len(first_rows)
+    enough = threading.Event()
+
     # Use a bounded thread-pool to avoid urllib3 "connection pool is full" warnings
+    client = _open_http2_client() if remaining_pages else None
     with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
         with tqdm(total=len(remaining_pages), desc="LeetCode pages", unit="page") as pbar:
-            futures = {pool.submit(_fetch_page, slug, page, results, lock): page for page in remaining_pages}
+            futures = {
+                pool.submit(_fetch_page, slug, page, results, enough, client): page for page in remaining_pages
+            }
 
-            # Early-exit once we have enough results – additional futures will complete
+            # Early-exit once we have enough results – queued pages are cancelled
+            # and any worker that is just starting returns without a request
             for fut in as_completed(futures):
                 pbar.update(1)
-                if len(results) >= limit:
+                filled += fut.result()
+                if filled >= limit:
+                    enough.set()
+                    for pending in futures:
+                        pending.cancel()
                     break
+    if client is not None:
+        client.close()
 
-    # Sort by rank (threads may have appended out-of-order)
-    results.sort(key=lambda x: x["rank"])
+    # Slots are already in rank order; drop the ones left by failed/short pages
+    results = [row for row in results if row is not None]
 
     cache.set_cached(cache_key, results)
     return results[:limit]
@@ -5,10 +5,18 @@ full pipeline: ingest data, resolve entities, score them, and generate a
 report.
 """
 
-import os, logging, math, json
+import os, logging, heapq, sqlite3
 from pathlib import Path
 from datetime import date, timedelta
 from collections import defaultdict, Counter
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from operator import itemgetter
+
+import numpy as np
+import orjson
+import pandas as pd
 
 from ingest import codeforces, kaggle, leetcode, cache
 from etl import entity_resolution, scoring, report
@@ -32,16 +40,79 @@ logger = logging.getLogger(__name__)
 # Optional env var TI_ONLY="leetcode" or "codeforces,leetcode" to limit sources fetched
 TI_ONLY = {s.strip().lower() for s in os.getenv("TI_ONLY", "codeforces,leetcode,kaggle").split(",") if s.strip()}
 
-# Persistent record of when a handle was first observed
+# Persistent record of when a handle was first observed.  The SQLite store
+# only receives the handles that are new each run; the legacy JSON map is
+# imported into it once.
+FIRST_SEEN_DB = Path("meta") / "first_seen.db"
 FIRST_SEEN_FILE = Path("meta") / "first_seen.json"
+_FIRST_SEEN_SCHEMA = "CREATE TABLE IF NOT EXISTS first_seen (handle TEXT PRIMARY KEY, first_date TEXT NOT NULL)"
+
+# First-seen dates repeat across handles, so each ISO string is parsed once
+_parse_date = lru_cache(maxsize=None)(date.fromisoformat)
+
+
+def _load_first_seen() -> dict[str, str]:
+    """Return the handle → first-seen ISO date map, migrating the JSON file if needed."""
+
+    FIRST_SEEN_DB.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(FIRST_SEEN_DB)) as conn, conn:
+        conn.execute(_FIRST_SEEN_SCHEMA)
+        if FIRST_SEEN_FILE.exists() and conn.execute("SELECT 1 FROM first_seen LIMIT 1").fetchone() is None:
+            legacy = orjson.loads(FIRST_SEEN_FILE.read_bytes())
+            conn.executemany("INSERT OR IGNORE INTO first_seen VALUES (?, ?)", legacy.items())
+            logger.info("Migrated %d first-seen entries from %s", len(legacy), FIRST_SEEN_FILE)
+        return dict(conn.execute("SELECT handle, first_date FROM first_seen"))
+
+
+def _save_first_seen(new_rows: list[tuple[str, str]]) -> None:
+    """Insert handles first observed this run (existing rows are never rewritten)."""
+
+    if not new_rows:
+        return
+    FIRST_SEEN_DB.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(FIRST_SEEN_DB)) as conn, conn:
+        conn.execute(_FIRST_SEEN_SCHEMA)
+        conn.executemany("INSERT OR IGNORE INTO first_seen VALUES (?, ?)", new_rows)
+
+
+def _percentiles(max_rank: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """Percentile of each rating within its bucket (highest rating → 1.0).
+
+    *max_rank* is the ascending ``rank(method="max")`` of the rating and
+    *total* its bucket size; ties share the best position, i.e.
+    ``1 - n_greater / (total - 1)``.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = 1 - (total - max_rank) / (total - 1)
+    return np.where(total > 1, pct, 1.0)
+
 
 def orchestrate() -> None:
     """Run the full talent identification pipeline."""
     logger.info("Starting ingestion phase")
 
-    cf_raw = codeforces.fetch_ratings() if "codeforces" in TI_ONLY else []
-    lc_raw = leetcode.fetch_contest_ranking(None) if "leetcode" in TI_ONLY else []
-    kg_raw = kaggle.fetch_leaderboard() if "kaggle" in TI_ONLY else []
+    # Sources are independent network-bound jobs – fetch them concurrently so
+    # the wall-clock cost is the slowest source rather than the sum
+    fetchers = {
+        "codeforces": codeforces.fetch_ratings,
+        "leetcode": lambda: leetcode.fetch_contest_ranking(None),
+        "kaggle": kaggle.fetch_leaderboard,
+    }
+    raw_by_src: dict[str, list] = {}
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as pool:
+        futures = {pool.submit(fetch): src for src, fetch in fetchers.items() if src in TI_ONLY}
+        for fut in as_completed(futures):
+            src = futures[fut]
+            try:
+                raw_by_src[src] = fut.result()
+            except Exception:
+                # One failing source must not take the others down with it
+                logger.exception("%s ingestion failed – continuing without it", src)
+                raw_by_src[src] = []
+
+    cf_raw = raw_by_src.get("codeforces", [])
+    lc_raw = raw_by_src.get("leetcode", [])
+    kg_raw = raw_by_src.get("kaggle", [])
 
     logger.info(
         "Fetched counts — Codeforces: %d, LeetCode: %d, Kaggle: %d",
@@ -59,17 +130,32 @@ def orchestrate() -> None:
     # longer attempt to pull a definitive "joined" date from Codeforces,
     # LeetCode or Kaggle.  Instead we record when a handle first shows up in
     # *our* ingestion pipeline and surface that as `platform_first_seen`.
-    # This timestamp is serialised to `meta/first_seen.json` so that future
+    # This timestamp is stored in `meta/first_seen.db` so that future
     # runs can detect newcomers.  In production we should store the same data
     # in a cloud datastore (e.g. BigQuery or DynamoDB) to enable weekly /
     # monthly cohort analysis of developer sign-ups across all sources.
-    today_iso = date.today().isoformat()
+    today = date.today()
+    today_iso = today.isoformat()
     try:
-        first_seen_map: dict[str, str] = json.loads(FIRST_SEEN_FILE.read_text()) if FIRST_SEEN_FILE.exists() else {}
-    except Exception:
+        first_seen_map = _load_first_seen()
+    except Exception as exc:
+        logger.warning("Could not load first_seen mapping: %s", exc)
         first_seen_map = {}
+    new_first_seen: list[tuple[str, str]] = []
 
+    # The same pass gathers the input columns for the vectorised stats below
+    src_col: list = []
+    handle_col: list = []
+    country_col: list = []
+    rating_col: list = []
+
+    debug = logger.isEnabledFor(logging.DEBUG)  # skip building per-row log args at INFO
     for ent in combined_raw:
+        src_col.append(ent["source"])
+        handle_col.append(ent["handle"])
+        country_col.append(ent.get("country") or None)
+        rating_col.append(ent.get("rating", 0.0))
+
         # Prefer platform-provided creation date
         # platform_date = ent.get("platform_first_seen")
         # if platform_date:
@@ -77,149 +163,155 @@ def orchestrate() -> None:
         #     first_src_tag = ent.get("source")  # e.g. leetcode, codeforces
         # else:
         handle_key = ent.get("handle") or ent.get("name")
-        first_date = first_seen_map.get(handle_key, today_iso)
+        first_date = first_seen_map.get(handle_key)
+        if first_date is None:
+            first_date = first_seen_map[handle_key] = today_iso
+            new_first_seen.append((handle_key, today_iso))
         first_src_tag = "local"
-        first_seen_map.setdefault(handle_key, first_date)
 
         ent["first_seen"] = first_date
         ent["first_seen_source"] = first_src_tag
         # Always expose a platform_first_seen value for downstream consumers
         # ent.setdefault("platform_first_seen", first_date)
-        ent["days_active"] = (date.fromisoformat(today_iso) - date.fromisoformat(first_date)).days
+        ent["days_active"] = (today - _parse_date(first_date)).days
         ent["fresh"] = ent["days_active"] < 365
 
-        logger.debug("First seen for %s determined as %s (%s)", ent.get("handle"), first_date, first_src_tag)
-
-    # Compute percentile-normalised score within each source (fair comparison)
-    ratings_by_src: dict[str, list[float]] = defaultdict(list)
-    for ent in combined_raw:
-        ratings_by_src[ent["source"]].append(ent.get("rating", 0.0))
-
-    percentile_map: dict[str, dict[float, float]] = {}
-    for src, values in ratings_by_src.items():
-        sorted_vals = sorted(values, reverse=True)
-        total = len(sorted_vals)
-        mapping: dict[float, float] = {}
-        for idx, val in enumerate(sorted_vals):
-            # Highest rating gets percentile 1.0
-            mapping[val] = max(mapping.get(val, 0), 1 - idx / (total - 1) if total > 1 else 1.0)
-        percentile_map[src] = mapping
-
-    total_in_src = {src: len(vals) for src, vals in ratings_by_src.items()}
+        if debug:
+            logger.debug("First seen for %s determined as %s (%s)", ent.get("handle"), first_date, first_src_tag)
 
     # -------------------------------------------------------------------
-    # Geo-percentile computation (source + country buckets)
+    # Percentile-normalised score within each source (fair comparison) and
+    # within each (source, country) bucket, plus per-source mean & std for
+    # the later momentum/z-score calc – one vectorised pass over all rows
     # -------------------------------------------------------------------
-    ratings_by_geo: dict[tuple[str, str], list[float]] = defaultdict(list)
-    for ent in combined_raw:
-        if ent.get("country"):
-            ratings_by_geo[(ent["source"], ent["country"])].append(ent.get("rating", 0.0))
-
-    geo_percentile_map: dict[tuple[str, str], dict[float, float]] = {}
-    for key, values in ratings_by_geo.items():
-        sorted_vals = sorted(values, reverse=True)
-        total = len(sorted_vals)
-        mapping: dict[float, float] = {}
-        for idx, val in enumerate(sorted_vals):
-            mapping[val] = max(mapping.get(val, 0.0), 1 - idx / (total - 1) if total > 1 else 1.0)
-        geo_percentile_map[key] = mapping
-
-    # Per-source mean & std for later momentum/z-score calc
-    source_stats: dict[str, dict[str, float]] = {}
-    for src, values in ratings_by_src.items():
-        if values:
-            mean = sum(values) / len(values)
-            var = sum((v - mean) ** 2 for v in values) / len(values)
-            source_stats[src] = {"mean": mean, "std": math.sqrt(var) or 1.0}
+    raw = pd.DataFrame({
+        "source": pd.Series(src_col, dtype=object),
+        "handle": pd.Series(handle_col, dtype=object),
+        "country": pd.Series(country_col, dtype=object),
+        "rating": pd.Series(rating_col, dtype=np.float64),
+    })
+
+    by_src = raw.groupby("source")["rating"]
+    raw["total_in_src"] = by_src.transform("size").astype(np.int64)
+    raw["norm"] = _percentiles(by_src.rank(method="max").to_numpy(), raw["total_in_src"].to_numpy(dtype=np.float64))
+
+    by_geo = raw.groupby(["source", "country"])["rating"]  # rows without a country drop out (NaN)
+    geo_pct = _percentiles(by_geo.rank(method="max").to_numpy(), by_geo.transform("size").to_numpy(dtype=np.float64))
+    raw["geo_norm"] = np.where(raw["country"].notna().to_numpy(), geo_pct, 0.0)
+
+    src_mean = by_src.mean()
+    src_std = by_src.std(ddof=0)
+    src_std = src_std.mask(src_std == 0, 1.0)
+
+    # Load yesterday ratings for momentum, keyed by (source, handle) – only for
+    # the sources ingested today, and not at all when nothing was ingested
+    prev_rows: list[tuple] = []
+    if len(src_mean):
+        try:
+            catalog = cache._load_catalog()
+            yesterday = (today - timedelta(days=1)).isoformat()
+            day_snapshot = catalog.get(yesterday, {})
+            prev_rows = [
+                (src, u.get("handle"), u.get("rating", 0))
+                for src in src_mean.index if src in day_snapshot
+                for u in day_snapshot[src]
+            ]
+        except Exception:
+            pass
+    prev_ratings = (
+        pd.DataFrame(prev_rows, columns=["source", "handle", "rating"])
+        .drop_duplicates(["source", "handle"], keep="last")
+        .set_index(["source", "handle"])["rating"]
+        .astype(np.float64)
+    )
 
-    for ent in combined_raw:
-        src = ent["source"]
-        ent["norm"] = percentile_map[src].get(ent.get("rating", 0.0), 0.0)
-        # Geo percentile within same country
-        country = ent.get("country")
-        if country:
-            ent["geo_norm"] = geo_percentile_map.get((src, country), {}).get(ent.get("rating", 0.0), 0.0)
-        else:
-            ent["geo_norm"] = 0.0
+    # Δσ = one-day rating change in units of the source's std-dev (0 when unseen yesterday)
+    prev = prev_ratings.reindex(pd.MultiIndex.from_arrays([raw["source"], raw["handle"]])).to_numpy()
+    delta = (raw["rating"].to_numpy() - prev) / raw["source"].map(src_std).to_numpy(dtype=np.float64)
+    raw["delta_sigma"] = np.where(np.isnan(prev), 0.0, delta)
+
+    # Back to the per-row dicts that entity resolution consumes
+    for ent, ent_norm, ent_geo, ent_total, ent_delta in zip(
+        combined_raw,
+        raw["norm"].tolist(),
+        raw["geo_norm"].tolist(),
+        raw["total_in_src"].tolist(),
+        raw["delta_sigma"].tolist(),
+    ):
+        ent["norm"] = ent_norm
+        ent["geo_norm"] = ent_geo
         ent["src_weight"] = 1.0  # uniform weight now
-        ent["total_in_src"] = total_in_src.get(src, 0)
-
-    # Load yesterday ratings for momentum
-    prev_ratings: dict[str, dict[str, float]] = defaultdict(dict)
-    try:
-        catalog = cache._load_catalog()
-        yesterday = (date.today() - timedelta(days=1)).isoformat()
-        day_snapshot = catalog.get(yesterday, {})
-        for src, data in day_snapshot.items():
-            for u in data:
-                prev_ratings[src][u.get("handle")] = u.get("rating", 0)
-    except Exception:
-        pass
-
-    for ent in combined_raw:
-        prev = prev_ratings.get(ent["source"], {}).get(ent["handle"])
-        if prev is not None and source_stats.get(ent["source"]):
-            std = source_stats[ent["source"]]["std"]
-            if std:
-                ent["delta_sigma"] = (ent.get("rating", 0) - prev) / std
-        else:
-            ent["delta_sigma"] = 0.0
+        ent["total_in_src"] = ent_total
+        ent["delta_sigma"] = ent_delta
 
     logger.info("Resolving entities (%d total raw)", len(combined_raw))
     # Resolve entities and compute versatility BEFORE scoring
-    entities = entity_resolution.resolve_entities(combined_raw)
-
-    for e in entities:
-        e["versatility"] = len(e.get("handles", {}))
-
-    # Compute rating-based z-score for each resolved entity (avoids percentile saturation)
+    # With a single platform there is nothing to match across sources, and
+    # distinct handles there are distinct accounts – skip the name matching
+    single_source = raw["source"].nunique() <= 1
+    entities = entity_resolution.resolve_entities(combined_raw, fuzzy=not single_source)
+
+    # Scoring prep as columns: versatility and the rating-based z-score per
+    # resolved entity (z avoids percentile saturation)
+    ent_src: list = []
+    ent_rating: list = []
+    ent_versatility: list = []
     for ent in entities:
-        src = ent["source"]
-        stats = source_stats.get(src)
-        if stats is not None:
-            ent["rating_z"] = (ent.get("rating", 0.0) - stats["mean"]) / stats["std"]
-        else:
-            ent["rating_z"] = 0.0
-
-    # Score
-    for entity in entities:
-        score, reason = scoring.interestingness_score(entity)
-        entity["score"] = score
-        entity["reason"] = reason
+        ent_src.append(ent["source"])
+        ent_rating.append(ent.get("rating", 0.0))
+        ent_versatility.append(len(ent.get("handles", {})))
+    prep = pd.DataFrame({
+        "source": pd.Series(ent_src, dtype=object),
+        "rating": pd.Series(ent_rating, dtype=np.float64),
+        "versatility": pd.Series(ent_versatility, dtype=np.int64),
+    })
+    ent_mean = prep["source"].map(src_mean)
+    prep["rating_z"] = np.where(ent_mean.notna(), (prep["rating"] - ent_mean) / prep["source"].map(src_std), 0.0)
+
+    for ent, versatility, z in zip(entities, prep["versatility"].tolist(), prep["rating_z"].tolist()):
+        ent["versatility"] = versatility
+        ent["rating_z"] = z
+
+    # Score – one batch pass; reason strings only for the reported entities
+    for entity, score in zip(entities, scoring.score_batch(entities)):
+        entity["score"] = float(score)
 
     logger.info("Scoring and ranking %d entities", len(entities))
-    # Sort by score desc
-    ranked_entities = sorted(entities, key=lambda e: e["score"], reverse=True)[:25]
-
-    logger.info("Writing report for top %d entities", len(ranked_entities))
-    # Report top 25
-    report.write_markdown_report(ranked_entities)
+    # Top 25 by score desc (heap selection – same order as a stable sort)
+    ranked_entities = heapq.nlargest(25, entities, key=itemgetter("score"))
+    for entity in ranked_entities:
+        _, entity["reason"] = scoring.interestingness_score(entity)
 
     # -------------------------------------------------------------------
-    # Append country-specific leaderboards (top 5 countries, 5 users each)
+    # Country-specific leaderboards (top 5 countries, 5 users each)
     # -------------------------------------------------------------------
-    country_counts = Counter([e.get("country") for e in entities if e.get("country")])
+    by_country: dict[str, list] = defaultdict(list)
+    for e in entities:
+        if e.get("country"):
+            by_country[e["country"]].append(e)
+    country_counts = Counter({c: len(members) for c, members in by_country.items()})
     top_countries = [c for c, _ in country_counts.most_common(5)]
 
-    with open("report.md", "a", encoding="utf-8") as fh:
-        for country in top_countries:
-            top_users = sorted([
-                e for e in entities if e.get("country") == country
-            ], key=lambda x: x["score"], reverse=True)[:5]
-            if not top_users:
-                continue
-            fh.write(f"\n\n## Top talent in {country}\n")
-            for idx, ent in enumerate(top_users, start=1):
-                handles = ent.get("handles", {ent.get("source", ""): ent.get("handle", "")})
-                handle_display = handles.get("codeforces") or handles.get("atcoder") or next(iter(handles.values()), "")
-                fh.write(f"{idx}. {ent['name']} ({handle_display}) — {int(ent['score'])}\n")
+    country_lines: list[str] = []
+    for country in top_countries:
+        top_users = heapq.nlargest(5, by_country[country], key=itemgetter("score"))
+        if not top_users:
+            continue
+        country_lines.append(f"\n\n## Top talent in {country}\n")
+        for idx, ent in enumerate(top_users, start=1):
+            country_lines.append(f"{idx}. {ent['name']} ({ent.get('display_handle', '')}) — {int(ent['score'])}\n")
+
+    logger.info("Writing report for top %d entities", len(ranked_entities))
+    # Report top 25 followed by the country leaderboards – one open, one flush
+    with open("report.md", "w", encoding="utf-8", buffering=1 << 20) as fh:
+        report.write_markdown_report(ranked_entities, fh)
+        fh.writelines(country_lines)
 
     logger.info("Pipeline complete → report.md")
 
-    # Persist updated first-seen map
+    # Persist handles first seen today
     try:
-        FIRST_SEEN_FILE.parent.mkdir(parents=True, exist_ok=True)
-        FIRST_SEEN_FILE.write_text(json.dumps(first_seen_map, indent=2))
+        _save_first_seen(new_first_seen)
     except Exception as exc:
         logger.warning("Could not save first_seen mapping: %s", exc)
 
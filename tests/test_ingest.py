@@ -1,5 +1,15 @@
-from ingest import codeforces, kaggle, leetcode
+from pathlib import Path
+import threading
 import time
+import types
+
+import orjson
+import pytest
+
+from ingest import codeforces, kaggle, leetcode
+from ingest.archive import atcoder
+
+FIXTURES = Path(__file__).parent / "fixtures"
 
 
 def test_fetch_ratings_returns_list():
@@ -12,4 +22,85 @@ def test_fetch_kaggle_returns_list():
 
 def test_fetch_leetcode_returns_list():
     # Without cookies this will return an empty list but still be a list.
-    assert isinstance(leetcode.fetch_contest_ranking(limit=0), list) 
\ No newline at end of file
+    assert isinstance(leetcode.fetch_contest_ranking(limit=0), list) 
+
+
+def test_parse_atcoder_ranking_page():
+    content = (FIXTURES / "atcoder_ranking.html").read_bytes()
+    users = atcoder._parse_page_lxml(content)
+    # Header, unranked ("-"), link-less and second-table rows are skipped
+    assert [(u["handle"], u["country"], u["rating"], u["rank"]) for u in users] == [
+        ("tourist", "BY", 3863, 1),
+        ("ksun48", "JP", 3646, 2),
+        ("no_flag", None, 0, 3),
+    ]
+    if atcoder._HAVE_SELECTOLAX:
+        assert atcoder._parse_page_lexbor(content) == users
+
+
+def _write_multiline_csv(path: Path, rows: int = 40_000) -> None:
+    # Large enough (>1 MiB) that quoted newlines straddle Arrow's read blocks
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write("Id,PostUserId,Message\n")
+        for i in range(rows):
+            user = "" if i % 10 == 0 else i % 7
+            fh.write(f'{i},{user},"first line of post {i}\nsecond, quoted ""line""\n"\n')
+
+
+@pytest.mark.parametrize("have_pyarrow", [True, False])
+def test_read_free_text_csv_with_multiline_values(tmp_path, monkeypatch, have_pyarrow):
+    monkeypatch.setattr(kaggle, "_HAVE_PYARROW", have_pyarrow and kaggle._HAVE_PYARROW)
+    path = tmp_path / "ForumMessages.csv"
+    _write_multiline_csv(path)
+    df = kaggle._read_csv(path, ["Id", "PostUserId"], free_text=True)
+    assert len(df) == 40_000
+    assert df["PostUserId"].isna().sum() == 4_000
+
+
+@pytest.mark.parametrize("have_pyarrow", [True, False])
+def test_count_by_handles_multiline_values(tmp_path, monkeypatch, have_pyarrow):
+    monkeypatch.setattr(kaggle, "_HAVE_PYARROW", have_pyarrow and kaggle._HAVE_PYARROW)
+    path = tmp_path / "ForumMessages.csv"
+    _write_multiline_csv(path)
+    counts = kaggle._count_by(path, "PostUserId")
+    # Every tenth row has no poster; the rest cycle through users 0..6
+    expected = {user: sum(1 for i in range(40_000) if i % 10 and i % 7 == user) for user in range(7)}
+    assert {int(k): int(v) for k, v in counts.items()} == expected
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self.content = orjson.dumps(payload)
+
+
+def _leetcode_user(rank, **fields):
+    return {"username": f"user{rank}", "rank": rank, "country_code": "US", **fields}
+
+
+def test_leetcode_later_pages_take_rating_not_rank(monkeypatch):
+    page_two = {"total_rank": [_leetcode_user(26, rating=2104.5, score=18), _leetcode_user(27, score=15)]}
+    monkeypatch.setattr(leetcode, "scraper", types.SimpleNamespace(get=lambda *a, **kw: _FakeResponse(page_two)))
+    out = [None] * (2 * leetcode._MAX_PER_PAGE)
+    assert leetcode._fetch_page("weekly-contest-1", 2, out, threading.Event()) == 2
+    # Page 2 owns slots 25..49; rating falls back to score, never to rank
+    assert [(r["rank"], r["rating"]) for r in out[25:27]] == [(26, 2104.5), (27, 15)]
+    assert out[:25] == [None] * 25
+
+
+def test_leetcode_oversized_first_page_stays_in_its_slots(monkeypatch):
+    # Page 1 answers with 30 rows and page 2 fails: ranks 26-30 must not
+    # occupy (or outgrow) the slots that belong to page 2
+    first_page = {"user_num": 50, "total_rank": [_leetcode_user(r, rating=3000 - r) for r in range(1, 31)]}
+
+    def fake_get(url, params, timeout):
+        if params["pagination"] == 1:
+            return _FakeResponse(first_page)
+        return types.SimpleNamespace(status_code=500, content=b"")
+
+    monkeypatch.setattr(leetcode, "scraper", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(leetcode, "_HAVE_HTTP2", False)
+    monkeypatch.setattr(leetcode.cache, "get_cached", lambda key: None)
+    monkeypatch.setattr(leetcode.cache, "set_cached", lambda key, data: None)
+    rows = leetcode.fetch_contest_ranking("weekly-contest-1", limit=50)
+    assert [r["rank"] for r in rows] == list(range(1, 26))
@@ -8,4 +8,57 @@ def test_resolve_entities_identity():
 
     # Placeholder test: ensures the function returns a list of same length.
     assert isinstance(resolved, list)
-    assert len(resolved) == len(sample) 
\ No newline at end of file
+    assert len(resolved) == len(sample)
+
+
+def test_resolve_entities_merges_reordered_names_across_sources():
+    sample = [
+        {"name": "Alice Smith", "handle": "asmith", "source": "codeforces", "rating": 2100},
+        {"name": "Bob", "handle": "bob", "source": "codeforces", "rating": 1500},
+        {"name": "smith alice", "handle": "alice_s", "source": "leetcode", "rating": 2400},
+    ]
+
+    resolved = entity_resolution.resolve_entities(sample)
+
+    assert [e["name"] for e in resolved] == ["Alice Smith", "Bob"]
+    alice = resolved[0]
+    assert alice["handles"] == {"codeforces": "asmith", "leetcode": "alice_s"}
+    assert alice["rating"] == 2400 and alice["source"] == "leetcode"
+
+
+def test_resolve_entities_groups_exact_source_handle():
+    sample = [
+        {"name": "Alice Liddell", "handle": "alice1", "source": "codeforces", "rating": 1900},
+        {"name": "alice1", "handle": "alice1", "source": "codeforces", "rating": 1950},
+    ]
+
+    resolved = entity_resolution.resolve_entities(sample)
+
+    assert len(resolved) == 1
+    assert resolved[0]["rating"] == 1950
+
+
+def test_resolve_entities_without_fuzzy_only_folds_repeated_handles():
+    sample = [
+        {"name": "Alice Smith", "handle": "asmith", "source": "codeforces", "rating": 2100},
+        {"name": "Alice Smith", "handle": "alice_s", "source": "codeforces", "rating": 1800},
+        {"name": "Alice Smith", "handle": "asmith", "source": "codeforces", "rating": 2200},
+    ]
+
+    resolved = entity_resolution.resolve_entities(sample, fuzzy=False)
+
+    assert [e["handles"] for e in resolved] == [{"codeforces": "asmith"}, {"codeforces": "alice_s"}]
+    assert resolved[0]["rating"] == 2200
+
+
+def test_resolve_entities_does_not_chain_through_intermediate_name():
+    # A~B and B~C clear the threshold but A and C do not
+    sample = [
+        {"name": "Alex Kowalski", "handle": "a", "source": "codeforces", "rating": 1},
+        {"name": "Alex Kowalsky", "handle": "b", "source": "leetcode", "rating": 1},
+        {"name": "Alex Kovalsky", "handle": "c", "source": "kaggle", "rating": 1},
+    ]
+
+    resolved = entity_resolution.resolve_entities(sample)
+
+    assert [e["handles"] for e in resolved] == [{"codeforces": "a", "leetcode": "b"}, {"kaggle": "c"}]
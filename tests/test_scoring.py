@@ -1,8 +1,30 @@
 from etl import scoring
 
+_PROFILES = [
+    {"name": "A", "rating": 2500, "source": "codeforces", "rating_z": 1.2, "delta_sigma": 2.0, "handles": {"codeforces": "a", "leetcode": "a"}, "versatility": 2},
+    {"name": "B", "rating": 2100, "source": "atcoder", "rating_z": -0.4, "rank": 5, "total_in_src": 100, "geo_norm": 0.8},
+    {"name": "C", "rating": 10, "source": "kaggle", "norm": 0.3},
+]
+
 
 def test_interestingness_score_returns_float_and_reason():
     profile = {"name": "Test", "rating": 1200, "source": "codeforces", "norm": 0.3}
     score, reason = scoring.interestingness_score(profile)
     assert isinstance(score, float)
-    assert isinstance(reason, str) 
\ No newline at end of file
+    assert isinstance(reason, str)
+
+
+def test_score_batch_matches_scalar_score():
+    batch = scoring.score_batch(_PROFILES)
+    for profile, batch_score in zip(_PROFILES, batch):
+        score, _ = scoring.interestingness_score(profile)
+        assert abs(score - batch_score) < 1e-9
+
+
+def test_score_batch_numpy_fallback_matches_scalar_score(monkeypatch):
+    # Exercise the pure-NumPy path even when numba is installed
+    monkeypatch.setattr(scoring, "_HAVE_NUMBA", False)
+    batch = scoring.score_batch(_PROFILES)
+    for profile, batch_score in zip(_PROFILES, batch):
+        score, _ = scoring.interestingness_score(profile)
+        assert abs(score - batch_score) < 1e-9